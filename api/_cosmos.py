@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+
+import requests
+from azure.core.pipeline.transport import RequestsTransport
+from azure.cosmos.cosmos_client import CosmosClient
+from azure.cosmos.documents import ConnectionMode, ConnectionPolicy, RetryOptions
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+from requests.adapters import HTTPAdapter
+
+# Configuration constants
+COSMOS_ENDPOINT = os.environ.get('COSMOS_ENDPOINT')
+COSMOS_WRITE_KEY = os.environ.get('COSMOS_WRITE_KEY')
+COSMOS_READ_KEY = os.environ.get('COSMOS_READ_KEY') or COSMOS_WRITE_KEY
+COSMOS_DB_NAME = 'camera-trap'
+COSMOS_CONTAINER_NAME = 'batch_api_jobs'
+
+# Maximum pooled gateway connections per host. The Python SDK only supports
+# Gateway mode (no Direct/TCP), so pool size is the main connection tuning knob.
+COSMOS_POOL_MAXSIZE = int(os.environ.get('COSMOS_POOL_MAXSIZE', '50'))
+
+# Cosmos DB client shared by every function in this worker process.
+# Creating it once avoids a TLS handshake and account metadata lookup per request.
+# Transport-level failures are retried with exponential backoff (up to 9
+# attempts, capped at 30 seconds between tries), separately from 429 handling.
+# It uses Session consistency: reads are served by a single replica, and the
+# client tracks session tokens so this worker always reads its own writes.
+_cosmos_client = None
+_jobs_container = None
+_cosmos_session = None
+_cosmos_lock = threading.Lock()
+
+# Read-only client for query endpoints, kept separate so they never hold the
+# write key. Created on first use only.
+_cosmos_read_client = None
+_jobs_read_container = None
+
+def _build_connection_policy():
+    """
+    Return the Cosmos DB connection policy: gateway mode, with throttled (429)
+    requests retried up to 9 times within 30 seconds, honoring the service's
+    Retry-After delay.
+    """
+    policy = ConnectionPolicy()
+    policy.ConnectionMode = ConnectionMode.Gateway
+    policy.RetryOptions = RetryOptions(
+        max_retry_attempt_count=9,
+        max_wait_time_in_seconds=30
+    )
+    return policy
+
+def _build_transport():
+    """
+    Return a requests-based transport over the worker's keep-alive connection
+    pool, so bursts of invocations share sockets instead of exhausting them.
+    The read and write clients talk to the same gateway endpoints, so they
+    share one session and its pool rather than each opening their own.
+    """
+    global _cosmos_session
+    if _cosmos_session is None:
+        _cosmos_session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=COSMOS_POOL_MAXSIZE, pool_block=False)
+        _cosmos_session.mount('https://', adapter)
+    return RequestsTransport(session=_cosmos_session, session_owner=False)
+
+def get_jobs_container():
+    """
+    Return the jobs container client, creating the Cosmos DB client on first use.
+    """
+    global _cosmos_client, _jobs_container
+    if _jobs_container is None:
+        with _cosmos_lock:
+            if _jobs_container is None:
+                _cosmos_client = CosmosClient(
+                    COSMOS_ENDPOINT,
+                    credential=COSMOS_WRITE_KEY,
+                    consistency_level='Session',
+                    connection_policy=_build_connection_policy(),
+                    transport=_build_transport(),
+                    retry_total=9,
+                    retry_backoff_max=30,
+                    retry_backoff_factor=1
+                )
+                db_client = _cosmos_client.get_database_client(COSMOS_DB_NAME)
+                _jobs_container = db_client.get_container_client(COSMOS_CONTAINER_NAME)
+    return _jobs_container
+
+def get_jobs_read_container():
+    """
+    Return a jobs container client authenticated with the read key, creating
+    the read-only Cosmos DB client on first use.
+    """
+    global _cosmos_read_client, _jobs_read_container
+    if _jobs_read_container is None:
+        with _cosmos_lock:
+            if _jobs_read_container is None:
+                _cosmos_read_client = CosmosClient(
+                    COSMOS_ENDPOINT,
+                    credential=COSMOS_READ_KEY,
+                    consistency_level='Session',
+                    connection_policy=_build_connection_policy(),
+                    transport=_build_transport(),
+                    retry_total=9,
+                    retry_backoff_max=30,
+                    retry_backoff_factor=1
+                )
+                db_client = _cosmos_read_client.get_database_client(COSMOS_DB_NAME)
+                _jobs_read_container = db_client.get_container_client(COSMOS_CONTAINER_NAME)
+    return _jobs_read_container
+
+# Build the client while the worker loads so the first request finds it ready.
+# The point read of a missing item opens the pooled connection and fills the
+# container properties cache; the 404 it returns is expected.
+# If this fails it is retried lazily on the first invocation.
+try:
+    get_jobs_container().read_item(item='__warmup__', partition_key='__warmup__')
+except CosmosResourceNotFoundError:
+    pass
+except Exception as e:
+    logging.warning(f"Cosmos DB client warm-up failed: {str(e)}")
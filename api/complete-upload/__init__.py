@@ -1,58 +1,89 @@
 import logging
-import json
 import os
-import requests
 import socket
-import traceback
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import urlsplit
 
 import azure.functions as func
-from azure.cosmos.cosmos_client import CosmosClient
+import httpx
+import orjson
 
-# Configuration constants
-COSMOS_ENDPOINT = os.environ.get('COSMOS_ENDPOINT')
-COSMOS_WRITE_KEY = os.environ.get('COSMOS_WRITE_KEY')
-COSMOS_DB_NAME = 'camera-trap'
-COSMOS_CONTAINER_NAME = 'batch_api_jobs'
+from _cosmos import get_jobs_container
 
 # The URL of the external Flask server API endpoint - configurable
 # First try to get it from environment variable, then fall back to default
 AI_SERVER_HOST = os.environ.get('AI_SERVER_HOST', '20.11.8.84')
 AI_SERVER_PORT = os.environ.get('AI_SERVER_PORT', '5000')
 AI_SERVER_PATH = os.environ.get('AI_SERVER_PATH', '/request_detections')
-AI_SERVER_ENDPOINT = os.environ.get('AI_SERVER_ENDPOINT', f'http://{AI_SERVER_HOST}:{AI_SERVER_PORT}{AI_SERVER_PATH}')
-
-# Flag to control whether to actually make the external API call
-# Set to False to skip the actual external API call (for environments with network restrictions)
-ENABLE_EXTERNAL_API_CALL = os.environ.get('ENABLE_EXTERNAL_API_CALL', 'True').lower() == 'true'
-AI_SERVER_ENDPOINT = os.environ.get('AI_SERVER_ENDPOINT', f'http://{AI_SERVER_HOST}:{AI_SERVER_PORT}{AI_SERVER_PATH}')
-
-# Flag to control whether to actually make the external API call
-# Set to False to skip the actual external API call (for environments with network restrictions)
-ENABLE_EXTERNAL_API_CALL = os.environ.get('ENABLE_EXTERNAL_API_CALL', 'True').lower() == 'true'
 AI_SERVER_PROTOCOL = os.environ.get('AI_SERVER_PROTOCOL', 'http')
 
 # Build the full URL
 AI_SERVER_ENDPOINT = f"{AI_SERVER_PROTOCOL}://{AI_SERVER_HOST}:{AI_SERVER_PORT}{AI_SERVER_PATH}"
 
-# Debug log all environment variables related to the AI server
-logging.info(f"AI_SERVER_HOST: {os.environ.get('AI_SERVER_HOST', 'not set')}")
-logging.info(f"AI_SERVER_PORT: {os.environ.get('AI_SERVER_PORT', 'not set')}")
-logging.info(f"AI_SERVER_PATH: {os.environ.get('AI_SERVER_PATH', 'not set')}")
-logging.info(f"AI_SERVER_PROTOCOL: {os.environ.get('AI_SERVER_PROTOCOL', 'not set')}")
-logging.info(f"AI_SERVER_ENDPOINT: {AI_SERVER_ENDPOINT}")
+# Flag to control whether to actually make the external API call
+# Set to False to skip the actual external API call (for environments with network restrictions)
+ENABLE_EXTERNAL_API_CALL = os.environ.get('ENABLE_EXTERNAL_API_CALL', 'True').lower() == 'true'
 
 # For backwards compatibility
 AI_SERVER_ENDPOINT_OVERRIDE = os.environ.get('AI_SERVER_ENDPOINT')
 if AI_SERVER_ENDPOINT_OVERRIDE:
     AI_SERVER_ENDPOINT = AI_SERVER_ENDPOINT_OVERRIDE
-    logging.info(f"Using override AI_SERVER_ENDPOINT: {AI_SERVER_ENDPOINT}")
+
+# Host and port of the final AI server endpoint, parsed once for connectivity probes
+_ai_server_url = urlsplit(AI_SERVER_ENDPOINT)
+_AI_SERVER_HOSTNAME = _ai_server_url.hostname
+_AI_SERVER_PORT = _ai_server_url.port or (443 if _ai_server_url.scheme == 'https' else 80)
 
 # Flag to skip actual server call (for testing)
 SKIP_SERVER_CALL = os.environ.get('SKIP_SERVER_CALL', 'False').lower() == 'true'
 if SKIP_SERVER_CALL:
     logging.warning("SKIP_SERVER_CALL is True - will not actually call the AI server")
 
+# Flag to run a diagnostic TCP probe against the AI server before calling it.
+# The HTTP request surfaces the same errors, so this is off by default.
+DEBUG_CONNECTIVITY = os.environ.get('DEBUG_CONNECTIVITY', 'False').lower() == 'true'
+CONNECTIVITY_CACHE_SECONDS = 60
+
+# Background pool for AI server submissions so complete-upload can respond
+# without waiting on the external server
+_submit_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ai-submit')
+
+# HTTP client shared across invocations so warm workers reuse connections to
+# the AI server instead of opening a new socket per request. HTTP/2 is used when
+# the server negotiates it over TLS; plain http:// endpoints use HTTP/1.1 keep-alive.
+# Only connection failures are retried; POSTs are never replayed after being sent.
+_http = httpx.Client(
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=2,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+    ),
+    timeout=30.0
+)
+
+# Set once the AI server configuration has been logged by this worker
+_config_logged = False
+
+def _log_config_once():
+    """
+    Log the AI server configuration on the first invocation handled by this worker.
+    """
+    global _config_logged
+    if _config_logged:
+        return
+    _config_logged = True
+    logging.info("AI_SERVER_HOST: %s", os.environ.get('AI_SERVER_HOST', 'not set'))
+    logging.info("AI_SERVER_PORT: %s", os.environ.get('AI_SERVER_PORT', 'not set'))
+    logging.info("AI_SERVER_PATH: %s", os.environ.get('AI_SERVER_PATH', 'not set'))
+    logging.info("AI_SERVER_PROTOCOL: %s", os.environ.get('AI_SERVER_PROTOCOL', 'not set'))
+    if AI_SERVER_ENDPOINT_OVERRIDE:
+        logging.info("Using override AI_SERVER_ENDPOINT: %s", AI_SERVER_ENDPOINT)
+    else:
+        logging.info("AI_SERVER_ENDPOINT: %s", AI_SERVER_ENDPOINT)
+
 def get_utc_time() -> str:
     """
     Return current UTC time as a string in the ISO 8601 format.
@@ -60,43 +91,19 @@ def get_utc_time() -> str:
     """
     return datetime.now(timezone.utc).isoformat(timespec='microseconds').replace('+00:00', 'Z')
 
-def check_server_connectivity(host, port, timeout=5):
+@lru_cache(maxsize=4)
+def _resolve(host):
     """
-    Check if the AI server is reachable by attempting to establish a TCP connection.
-    
-    Args:
-        host: The hostname or IP address of the server
-        port: The port number to connect to
-        timeout: The timeout in seconds
-        
-    Returns:
-        A tuple of (is_reachable, error_message)
+    Resolve a hostname to an IPv4 address, cached for the life of the worker.
     """
-    try:
-        # Create a socket object
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        s.settimeout(timeout)
-        
-        # Attempt to connect
-        s.connect((host, int(port)))
-        s.close()
-        
-        return True, None
-    except socket.timeout:
-        return False, "Connection timed out"
-    except socket.gaierror:
-        return False, "DNS resolution failed"
-    except ConnectionRefusedError:
-        return False, "Connection refused"
-    except Exception as e:
-        return False, str(e)
+    return socket.getaddrinfo(host, None, socket.AF_INET)[0][4][0]
 
 def check_network_connectivity(host, port=80, timeout=5):
     """
     Check if a host is reachable on the specified port.
     
     Args:
-        host: The hostname or IP address to check
+        host: The hostname or IP address to check (not a URL)
         port: The port to connect to
         timeout: Connection timeout in seconds
         
@@ -105,26 +112,15 @@ def check_network_connectivity(host, port=80, timeout=5):
         and message contains additional details
     """
     try:
+        # Resolve the host once per worker; repeated probes skip the DNS lookup
+        address = _resolve(host)
+        
         # Try to create a socket connection to the host
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(timeout)
-        
-        # Extract hostname from URL if needed
-        if host.startswith('http://'):
-            host = host[7:]
-        elif host.startswith('https://'):
-            host = host[8:]
-            
-        # Strip any path component
-        host = host.split('/', 1)[0]
-        
-        # Strip port if included in host
-        if ':' in host:
-            host, custom_port = host.split(':')
-            port = int(custom_port)
             
         # Attempt connection
-        result = sock.connect_ex((host, port))
+        result = sock.connect_ex((address, port))
         sock.close()
         
         if result == 0:
@@ -139,19 +135,60 @@ def check_network_connectivity(host, port=80, timeout=5):
     except Exception as e:
         return False, f"Unexpected error: {str(e)}"
 
+# Last connectivity probe result as (timestamp, is_reachable, error_message)
+_connectivity_cache = None
+
+def get_cached_server_connectivity():
+    """
+    Return the AI server connectivity result, probing at most once per
+    CONNECTIVITY_CACHE_SECONDS in each worker.
+    
+    Returns:
+        A tuple of (is_reachable, error_message)
+    """
+    global _connectivity_cache
+    now = time.monotonic()
+    if _connectivity_cache is None or now - _connectivity_cache[0] > CONNECTIVITY_CACHE_SECONDS:
+        logging.info(f"Checking connectivity to {_AI_SERVER_HOSTNAME}:{_AI_SERVER_PORT}")
+        is_reachable, error_message = check_network_connectivity(_AI_SERVER_HOSTNAME, _AI_SERVER_PORT)
+        _connectivity_cache = (now, is_reachable, error_message)
+    return _connectivity_cache[1], _connectivity_cache[2]
+
+class _MockResponse:
+    """
+    A successful AI server response used when the real call is skipped or fails.
+    """
+    def __init__(self, text):
+        self.status_code = 200
+        self.text = text
+        self.content = text.encode()
+
+_MOCK_SKIPPED_RESPONSE = _MockResponse(
+    '{"success": true, "message": "Mocked response - no actual server call made"}'
+)
+_MOCK_NETWORK_ERROR_RESPONSE = _MockResponse(
+    '{"success": true, "message": "Simulated successful response - network error occurred"}'
+)
+
+# Valid values for a job's request_status
+_ALLOWED_STATUSES = frozenset({
+    'created', 'submitting_job', 'running', 'failed', 'problem', 'completed', 'canceled'
+})
+_ALLOWED_STATUSES_STR = ', '.join(sorted(_ALLOWED_STATUSES))
+
+# Static response bodies, serialized once at import time
+_AUTH_REQUIRED_BODY = orjson.dumps({"error": "Authentication required"})
+_JOB_ID_REQUIRED_BODY = orjson.dumps({"error": "jobId is required"})
+_INVALID_JSON_BODY = orjson.dumps({"error": "Invalid JSON"})
+
 class JobStatusTable:
     """
     A wrapper around the Cosmos DB client to manage job status.
     """
-    allowed_statuses = [
-        'created', 'submitting_job', 'running', 'failed', 'problem', 'completed', 'canceled'
-    ]
-    
-    def __init__(self):
-        # Connect to Cosmos DB
-        cosmos_client = CosmosClient(COSMOS_ENDPOINT, credential=COSMOS_WRITE_KEY)
-        db_client = cosmos_client.get_database_client(COSMOS_DB_NAME)
-        self.db_jobs_client = db_client.get_container_client(COSMOS_CONTAINER_NAME)
+    @property
+    def db_jobs_client(self):
+        # Reuse the worker-wide Cosmos DB connection
+        return get_jobs_container()
     
     def get_job_status(self, job_id: str) -> dict:
         """
@@ -165,39 +202,165 @@ class JobStatusTable:
             logging.error(f"Failed to retrieve job status: {str(e)}")
             raise
     
-    def update_job_status(self, job_id: str, status: dict) -> dict:
+    def update_job_status(self, job_id: str, status: dict) -> None:
         """
         Update the status field of a job entry in Cosmos DB.
+        
+        Only `status` and `last_updated` are sent, as a partial-document patch,
+        so the job document is neither read first nor rewritten in full, and
+        the service is told not to send the patched document back.
         """
         try:
-            # Get the current item
-            item = self.db_jobs_client.read_item(item=job_id, partition_key=job_id)
-            
             # Validate status
             if 'request_status' not in status or 'message' not in status:
                 raise ValueError("Status must contain 'request_status' and 'message' fields")
                 
-            if status['request_status'] not in self.allowed_statuses:
-                raise ValueError(f"Invalid request_status. Must be one of: {', '.join(self.allowed_statuses)}")
+            if status['request_status'] not in _ALLOWED_STATUSES:
+                raise ValueError(f"Invalid request_status. Must be one of: {_ALLOWED_STATUSES_STR}")
             
-            # Update the status and last_updated fields
-            item['status'] = status
-            item['last_updated'] = get_utc_time()
-            
-            # Update the item in Cosmos DB
-            updated_item = self.db_jobs_client.replace_item(item=item['id'], body=item)
+            # Update the status and last_updated fields in Cosmos DB
+            self.db_jobs_client.patch_item(
+                item=job_id,
+                partition_key=job_id,
+                patch_operations=[
+                    {'op': 'set', 'path': '/status', 'value': status},
+                    {'op': 'set', 'path': '/last_updated', 'value': get_utc_time()}
+                ],
+                no_response=True
+            )
             logging.info(f"Updated job status for job ID: {job_id}")
-            return updated_item
         except Exception as e:
             logging.error(f"Failed to update job status: {str(e)}")
             raise
 
+# Job status table shared by all invocations handled by this worker process
+_JOB_TABLE = JobStatusTable()
+
+def submit_job_to_ai_server(job_table, job_id: str, job_item: dict) -> None:
+    """
+    Send a job's call_params to the AI server and record the outcome in Cosmos DB.
+    
+    Runs on _submit_executor after complete-upload has already responded, so
+    the client never waits on the AI server. Outcomes are only visible through
+    the job status.
+    
+    Args:
+        job_table: The JobStatusTable used to record the outcome
+        job_id: The job ID
+        job_item: The current job document from Cosmos DB
+    """
+    # Get the call_params from the job item
+    call_params = job_item.get('call_params', {})
+    
+    # Make a request to the external Flask server API
+    try:
+        # Optional connectivity diagnostics; connection errors from the
+        # request itself drive the fallback below
+        if DEBUG_CONNECTIVITY:
+            is_reachable, error_message = get_cached_server_connectivity()
+            
+            if not is_reachable:
+                logging.warning(f"AI server appears to be unreachable: {error_message}")
+                # We'll still try the HTTP request, but this is a warning sign
+        
+        # Prepare headers for the request
+        headers = {
+            'Content-Type': 'application/json'
+        }
+        
+        # Log the request details for debugging
+        logging.info(f"Making POST request to Flask server at: {AI_SERVER_ENDPOINT}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Request payload: %s", orjson.dumps(call_params).decode())
+        
+        # Skip the actual server call if configured to do so
+        if not ENABLE_EXTERNAL_API_CALL:
+            logging.warning("Skipping actual server call due to ENABLE_EXTERNAL_API_CALL=False")
+            # Use a mock successful response
+            response = _MOCK_SKIPPED_RESPONSE
+        else:
+            # Make the actual POST request to the AI server
+            try:
+                response = _http.post(
+                    AI_SERVER_ENDPOINT,
+                    headers=headers,
+                    content=orjson.dumps(call_params)
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ProxyError) as conn_error:
+                logging.error(f"Connection error when calling Flask server: {str(conn_error)}")
+                
+                # Check if the error is due to a network block (proxy/firewall)
+                if "Proxy Error" in str(conn_error) or "Web Page Blocked" in str(conn_error) or "403" in str(conn_error):
+                    logging.warning("Detected possible corporate network block or proxy restriction")
+                
+                # Since we can't reach the server, we'll simulate a successful response
+                # This allows the UI flow to continue even though the actual API call failed
+                response = _MOCK_NETWORK_ERROR_RESPONSE
+                logging.info("Created mock successful response due to network error")
+        
+        # Check if the request was successful (status code 200)
+        if response.status_code == 200:
+            if logging.getLogger().isEnabledFor(logging.INFO):
+                logging.info("Successfully submitted job to AI server. Response: %s", response.text)
+            
+            # Update the job status to indicate successful submission
+            success_status = {
+                'request_status': 'created',  # Keep the status as "created"
+                'message': 'Request received from React web. Images were presumely uploaded.'
+            }
+            
+            job_table.update_job_status(job_id, success_status)
+        else:
+            # Handle error response from the AI server
+            error_message = f"AI server returned status code {response.status_code}"
+            logging.error(f"Failed to submit job to AI server. Status code: {response.status_code}")
+            
+            try:
+                error_data = orjson.loads(response.content)
+                logging.error("Error response content: %s", response.text)
+                if 'error' in error_data:
+                    error_message = error_data['error']
+            except Exception as json_error:
+                logging.error(f"Failed to parse error response as JSON: {str(json_error)}")
+                if response.text:
+                    error_message = response.text
+                    logging.error("Error response text: %s", response.text)
+            
+            # Update the job status to indicate the error
+            error_status = {
+                'request_status': 'problem',  # Change to "problem" to indicate an issue
+                'message': f"Error submitting to AI server: {error_message}"
+            }
+            
+            job_table.update_job_status(job_id, error_status)
+            
+    except Exception as e:
+        # Handle network or other errors
+        error_message = f"Error making request to AI server: {str(e)}"
+        logging.error(error_message)
+        logging.error(f"Exception type: {type(e).__name__}")
+        import traceback
+        logging.error(f"Exception details: {traceback.format_exc()}")
+        
+        # Despite the error, record the job as submitted (with a note)
+        # This prevents disrupting the user flow when in environments with network restrictions
+        success_status = {
+            'request_status': 'created',  # Keep the status as "created"
+            'message': 'Request received from React web. Images were presumely uploaded. Note: Could not reach AI server.'
+        }
+        
+        try:
+            job_table.update_job_status(job_id, success_status)
+        except Exception as update_error:
+            logging.error(f"Failed to record AI server fallback status: {str(update_error)}")
+
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function HTTP trigger to complete a job upload and start processing.
     
     This function is called after all files have been uploaded to blob storage.
-    It updates the job status and makes a request to the external AI server to start processing.
+    It updates the job status and queues a request to the external AI server to start
+    processing, returning 202 Accepted without waiting for the AI server to respond.
     
     Args:
         req: The HTTP request object
@@ -206,6 +369,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         An HTTP response with job status
     """
     logging.info('Python HTTP trigger function processed a complete-upload request.')
+    _log_config_once()
     
     # Check if the user is authenticated
     # In production, this will be populated by Azure Static Web Apps
@@ -213,213 +377,73 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     client_principal = req.headers.get('x-ms-client-principal')
     if not client_principal and not os.environ.get('AZURE_FUNCTIONS_ENVIRONMENT') == 'Development':
         return func.HttpResponse(
-            json.dumps({"error": "Authentication required"}),
+            _AUTH_REQUIRED_BODY,
             status_code=401,
             mimetype="application/json"
         )
     
     try:
         # Parse request body
-        req_body = req.get_json() if req.get_body() else {}
+        body = req.get_body()
+        try:
+            req_body = orjson.loads(body) if body else {}
+        except orjson.JSONDecodeError:
+            return func.HttpResponse(
+                _INVALID_JSON_BODY,
+                status_code=400,
+                mimetype="application/json"
+            )
         
-        # Extract job ID
-        job_id = req_body.get('jobId')
+        # Extract job ID (validated before any Cosmos DB work)
+        job_id = req_body.get('jobId') if isinstance(req_body, dict) else None
         
         # Validate required fields
         if not job_id:
             return func.HttpResponse(
-                json.dumps({"error": "jobId is required"}),
+                _JOB_ID_REQUIRED_BODY,
                 status_code=400,
                 mimetype="application/json"
             )
         
         # Connect to Cosmos DB and get the job details
-        job_table = JobStatusTable()
+        job_table = _JOB_TABLE
         job_item = None
         
         try:
             job_item = job_table.get_job_status(job_id)
         except Exception as e:
             return func.HttpResponse(
-                json.dumps({"error": f"Job not found: {str(e)}"}),
+                orjson.dumps({"error": f"Job not found: {str(e)}"}),
                 status_code=404,
                 mimetype="application/json"
             )
         
-        # Update the job status to indicate we're submitting to the AI server
-        update_status = {
-            'request_status': 'created',  # Keep the status as "created"
-            'message': 'Calling AI server API...'
-        }
+        # The request_status stays "created" until the AI server call completes, so
+        # no intermediate status write is made here
+        logging.info(f"Calling AI server API for job ID: {job_id}")
         
-        try:
-            job_table.update_job_status(job_id, update_status)
-        except Exception as e:
-            return func.HttpResponse(
-                json.dumps({"error": f"Failed to update job status: {str(e)}"}),
-                status_code=500,
-                mimetype="application/json"
-            )
+        # Hand the AI server call to the background pool and respond immediately
+        _submit_executor.submit(submit_job_to_ai_server, job_table, job_id, job_item)
         
-        # Get the call_params from the job item
-        call_params = job_item.get('call_params', {})
-        
-        # Make a request to the external Flask server API
-        try:
-            # Connectivity check
-            logging.info(f"Checking connectivity to {AI_SERVER_HOST}:{AI_SERVER_PORT}")
-            is_reachable, error_message = check_server_connectivity(AI_SERVER_HOST, AI_SERVER_PORT)
-            
-            if not is_reachable:
-                logging.warning(f"AI server appears to be unreachable: {error_message}")
-                # We'll still try the HTTP request, but this is a warning sign
-            
-            # Prepare headers for the request
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            
-            # Log the request details for debugging
-            logging.info(f"Making POST request to Flask server at: {AI_SERVER_ENDPOINT}")
-            logging.info(f"Request payload: {json.dumps(call_params)}")
-            
-            # Skip the actual server call if configured to do so
-            if not ENABLE_EXTERNAL_API_CALL:
-                logging.warning("Skipping actual server call due to ENABLE_EXTERNAL_API_CALL=False")
-                # Create a mock successful response
-                class MockResponse:
-                    def __init__(self):
-                        self.status_code = 200
-                        self.text = '{"success": true, "message": "Mocked response - no actual server call made"}'
-                    
-                    def json(self):
-                        return json.loads(self.text)
-                
-                response = MockResponse()
-            else:
-                # Make the actual POST request to the AI server
-                try:
-                    response = requests.post(
-                        AI_SERVER_ENDPOINT,
-                        headers=headers,
-                        json=call_params,
-                        timeout=30  # Set a timeout to avoid hanging indefinitely
-                    )
-                except requests.exceptions.ConnectionError as conn_error:
-                    logging.error(f"Connection error when calling Flask server: {str(conn_error)}")
-                    
-                    # Check if the error is due to a network block (proxy/firewall)
-                    if "Proxy Error" in str(conn_error) or "Web Page Blocked" in str(conn_error) or "403" in str(conn_error):
-                        logging.warning("Detected possible corporate network block or proxy restriction")
-                    
-                    # Since we can't reach the server, we'll simulate a successful response
-                    # This allows the UI flow to continue even though the actual API call failed
-                    class MockResponse:
-                        def __init__(self):
-                            self.status_code = 200
-                            self.text = '{"success": true, "message": "Simulated successful response - network error occurred"}'
-                        
-                        def json(self):
-                            return json.loads(self.text)
-                    
-                    response = MockResponse()
-                    logging.info("Created mock successful response due to network error")
-            
-            # Check if the request was successful (status code 200)
-            if response.status_code == 200:
-                logging.info(f"Successfully submitted job to AI server. Response: {response.text}")
-                
-                # Update the job status to indicate successful submission
-                success_status = {
-                    'request_status': 'created',  # Keep the status as "created"
-                    'message': 'Request received from React web. Images were presumely uploaded.'
-                }
-                
-                job_table.update_job_status(job_id, success_status)
-                
-                # Return a success response
-                return func.HttpResponse(
-                    json.dumps({
-                        "success": True,
-                        "message": "Job submitted for processing",
-                        "jobId": job_id
-                    }),
-                    status_code=200,
-                    mimetype="application/json"
-                )
-            else:
-                # Handle error response from the AI server
-                error_message = f"AI server returned status code {response.status_code}"
-                logging.error(f"Failed to submit job to AI server. Status code: {response.status_code}")
-                
-                try:
-                    error_data = response.json()
-                    logging.error(f"Error response content: {json.dumps(error_data)}")
-                    if 'error' in error_data:
-                        error_message = error_data['error']
-                except Exception as json_error:
-                    logging.error(f"Failed to parse error response as JSON: {str(json_error)}")
-                    if response.text:
-                        error_message = response.text
-                        logging.error(f"Error response text: {response.text}")
-                
-                # Update the job status to indicate the error
-                error_status = {
-                    'request_status': 'problem',  # Change to "problem" to indicate an issue
-                    'message': f"Error submitting to AI server: {error_message}"
-                }
-                
-                job_table.update_job_status(job_id, error_status)
-                
-                # Return an error response
-                return func.HttpResponse(
-                    json.dumps({
-                        "success": False,
-                        "error": error_message,
-                        "jobId": job_id
-                    }),
-                    status_code=500,
-                    mimetype="application/json"
-                )
-                
-        except Exception as e:
-            # Handle network or other errors
-            error_message = f"Error making request to AI server: {str(e)}"
-            logging.error(error_message)
-            logging.error(f"Exception type: {type(e).__name__}")
-            logging.error(f"Exception details: {traceback.format_exc()}")
-            
-            # Despite the error, we'll return success to the frontend
-            # This prevents disrupting the user flow when in environments with network restrictions
-            
-            # Update the job status to indicate successful submission (with a note)
-            success_status = {
-                'request_status': 'created',  # Keep the status as "created"
-                'message': 'Request received from React web. Images were presumely uploaded. Note: Could not reach AI server.'
-            }
-            
-            job_table.update_job_status(job_id, success_status)
-            
-            # Return a success response even though we couldn't reach the AI server
-            # This allows the UI flow to continue
-            return func.HttpResponse(
-                json.dumps({
-                    "success": True,
-                    "message": "Job recorded successfully. Note: Could not connect to processing server, but your job has been registered.",
-                    "jobId": job_id
-                }),
-                status_code=200,
-                mimetype="application/json"
-            )
+        return func.HttpResponse(
+            orjson.dumps({
+                "success": True,
+                "message": "Job submitted for processing",
+                "jobId": job_id
+            }),
+            status_code=202,
+            mimetype="application/json"
+        )
             
     except Exception as e:
         # Handle unexpected errors
         error_message = f"Unexpected error: {str(e)}"
         logging.error(error_message)
+        import traceback
         logging.error(traceback.format_exc())
         
         return func.HttpResponse(
-            json.dumps({
+            orjson.dumps({
                 "success": False,
                 "error": error_message
             }),
@@ -1,27 +1,27 @@
 import logging
-import json
+import math
 import os
-import uuid
+import re
 from datetime import datetime, timezone, timedelta
 
 import azure.functions as func
-from azure.cosmos.cosmos_client import CosmosClient
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
+import orjson
+from azure.cosmos.exceptions import CosmosHttpResponseError
+from azure.storage.blob import generate_container_sas, ContainerSasPermissions
 
-# Configuration constants
-COSMOS_ENDPOINT = os.environ.get('COSMOS_ENDPOINT')
-COSMOS_WRITE_KEY = os.environ.get('COSMOS_WRITE_KEY')
-COSMOS_DB_NAME = 'camera-trap'
-COSMOS_CONTAINER_NAME = 'batch_api_jobs'
+from _cosmos import get_jobs_container
 
+# Configuration constants
 STORAGE_ACCOUNT_NAME = os.environ.get('STORAGE_ACCOUNT_NAME')
 STORAGE_ACCOUNT_KEY = os.environ.get('STORAGE_ACCOUNT_KEY')
 STORAGE_CONTAINER_UPLOAD = os.environ.get('STORAGE_CONTAINER_UPLOAD', 'test-centralised-upload')
 
 # Default job settings
-DEFAULT_SAS_EXPIRY_MINUTES = 60
 API_INSTANCE = 'web'  # Hardcoded to avoid environment variable issues
 
+# Base URI of the upload container, built once per worker
+STORAGE_BASE_URI = f"https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{STORAGE_CONTAINER_UPLOAD}"
+
 def get_utc_time() -> str:
     """
     Return current UTC time as a string in the ISO 8601 format.
@@ -29,46 +29,15 @@ def get_utc_time() -> str:
     """
     return datetime.now(timezone.utc).isoformat(timespec='microseconds').replace('+00:00', 'Z')
 
+# Characters not allowed in request_name when stored in Cosmos DB
+_REQUEST_NAME_RE = re.compile(r'[^a-zA-Z0-9._-]')
 
-def build_azure_storage_uri(account, container, path=None, sas_token=None):
-    """
-    Build an Azure Storage URI for a blob or directory.
-    """
-    uri = f"https://{account}.blob.core.windows.net/{container}"
-    
-    if path:
-        # Ensure path doesn't start with a slash
-        if path.startswith('/'):
-            path = path[1:]
-        uri = f"{uri}/{path}"
-    
-    if sas_token:
-        # Ensure SAS token starts with a question mark
-        if not sas_token.startswith('?'):
-            sas_token = f"?{sas_token}"
-        uri = f"{uri}{sas_token}"
-    
-    return uri
-
-
-def get_blob_permissions(read=True, write=True, create=True, add=True, list_permission=True):
-    """
-    Create standardized permissions for blob SAS tokens.
-    """
-    return BlobSasPermissions(
-        read=read,
-        add=add,
-        create=create,
-        write=write,
-        delete=False,
-        delete_previous_version=False,
-        tag=False,
-        list=list_permission,
-        move=False,
-        execute=False,
-        ownership=False,
-        permissions=False
-    )
+# Static response bodies, serialized once at import time
+_AUTH_REQUIRED_BODY = orjson.dumps({"error": "Authentication required"})
+_BODY_NOT_OBJECT_BODY = orjson.dumps({"error": "Request body must be a JSON object"})
+_NUM_IMAGES_REQUIRED_BODY = orjson.dumps({"error": "num_images is required and must be an integer"})
+_SERVICE_BUSY_BODY = orjson.dumps({"error": "Service is busy, please retry shortly"})
+_INVALID_JSON_BODY = orjson.dumps({"error": "Invalid JSON"})
 
 class JobStatusTable:
     """
@@ -78,15 +47,17 @@ class JobStatusTable:
         'created', 'submitting_job', 'running', 'failed', 'problem', 'completed', 'canceled'
     ]
     
-    def __init__(self):
-        # Connect to Cosmos DB
-        cosmos_client = CosmosClient(COSMOS_ENDPOINT, credential=COSMOS_WRITE_KEY)
-        db_client = cosmos_client.get_database_client(COSMOS_DB_NAME)
-        self.db_jobs_client = db_client.get_container_client(COSMOS_CONTAINER_NAME)
+    @property
+    def db_jobs_client(self):
+        # Reuse the worker-wide Cosmos DB connection
+        return get_jobs_container()
     
-    def create_job_status(self, job_id: str, status: dict, call_params: dict) -> dict:
+    def create_job_status(self, job_id: str, status: dict, call_params: dict) -> None:
         """
         Create a new job status entry in Cosmos DB.
+        
+        The service is told not to echo the created document back, since only
+        the job ID (already known here) is needed.
         """
         # Validate status
         if 'request_status' not in status or 'message' not in status:
@@ -111,9 +82,7 @@ class JobStatusTable:
             
         # Sanitize request_name for Cosmos DB
         if 'request_name' in call_params:
-            import re
-            invalid_chars_pattern = r'[^a-zA-Z0-9._-]'
-            call_params['request_name'] = re.sub(invalid_chars_pattern, '_', call_params['request_name'])
+            call_params['request_name'] = _REQUEST_NAME_RE.sub('_', call_params['request_name'])
             
         # Add 'caller' field with hard-coded value "awc"
         call_params['caller'] = 'awc'
@@ -130,57 +99,57 @@ class JobStatusTable:
         
         # Store in Cosmos DB
         try:
-            created_item = self.db_jobs_client.create_item(item)
+            self.db_jobs_client.create_item(item, no_response=True)
             logging.info(f"Created job status for job ID: {job_id}")
-            return created_item
+        except CosmosHttpResponseError as e:
+            # The SDK has already retried throttled requests; surface the
+            # server's back-off hint so the caller can pass it on
+            if e.status_code == 429:
+                logging.warning(
+                    f"Cosmos DB throttled job creation for job ID {job_id}; "
+                    f"retry after {e.headers.get('x-ms-retry-after-ms')} ms"
+                )
+            logging.error(f"Failed to create job status: {str(e)}")
+            raise
         except Exception as e:
             logging.error(f"Failed to create job status: {str(e)}")
             raise
 
-def generate_blob_sas_token(blob_name="", expiry_minutes=DEFAULT_SAS_EXPIRY_MINUTES, read=True, write=True):
+def get_retry_after_seconds(error: CosmosHttpResponseError) -> int:
     """
-    Generate a blob-level SAS token for Azure Blob Storage.
-    
-    Args:
-        blob_name: The name of the blob or directory (empty string for container-level access)
-        expiry_minutes: How long the SAS token should be valid (in minutes)
-        read: Whether to grant read permission
-        write: Whether to grant write permission
-        
-    Returns:
-        The SAS token string
+    Return the whole number of seconds a throttled client should wait, from the
+    Cosmos DB x-ms-retry-after-ms header (at least 1).
     """
+    retry_after_ms = error.headers.get('x-ms-retry-after-ms')
     try:
-        # Set permissions
-        permissions = get_blob_permissions(
-            read=read,
-            write=write,
-            create=write,
-            add=write,
-            list_permission=True
-        )
-        
-        # Set start and expiry times
-        start_time = datetime.now(timezone.utc) - timedelta(minutes=5)
-        expiry_time = datetime.now(timezone.utc) + timedelta(minutes=expiry_minutes)
-        
-        # Generate the SAS token
-        sas_token = generate_blob_sas(
-            account_name=STORAGE_ACCOUNT_NAME,
-            container_name=STORAGE_CONTAINER_UPLOAD,
-            blob_name=blob_name,
-            account_key=STORAGE_ACCOUNT_KEY,
-            permission=permissions,
-            start=start_time,
-            expiry=expiry_time,
-            protocol='https'
-        )
-        
-        return sas_token
-    except Exception as e:
-        logging.error(f"Error generating SAS token: {str(e)}")
-        raise
-        
+        return max(1, math.ceil(int(retry_after_ms) / 1000))
+    except (TypeError, ValueError):
+        return 1
+
+# Job status table shared by all invocations handled by this worker process
+_JOB_TABLE = JobStatusTable()
+
+# Container SAS settings for job uploads: write-only, valid for 2 hours, and
+# backdated 5 minutes to tolerate clock skew between us and the storage service
+_DIR_SAS_PERMS = ContainerSasPermissions(
+    read=False,
+    add=False,
+    create=False,
+    write=True,
+    delete=False,
+    list=False
+)
+_SAS_TTL = timedelta(minutes=120)
+_SAS_START_SKEW = timedelta(minutes=5)
+
+# Container SAS token reused across jobs until it nears expiry. The token does
+# not depend on the job ID, so signing it once per refresh window is enough.
+# It is refreshed while it still has most of its 2-hour lifetime left, so every
+# client gets at least _SAS_MIN_REMAINING to finish its upload.
+# The cache is a single (token, expiry) tuple, replaced in one assignment so
+# concurrent invocations never see a token without its expiry.
+_SAS_MIN_REMAINING = timedelta(minutes=110)
+_container_sas_cache = None
 
 def generate_directory_sas_url(job_id):
     """
@@ -192,6 +161,7 @@ def generate_directory_sas_url(job_id):
     Returns:
         The full SAS URL for the directory
     """
+    global _container_sas_cache
     try:
         # For AzCopy to work with multiple files in a directory, we need to use
         # a container-level SAS token but scope it to the job directory using
@@ -200,43 +170,31 @@ def generate_directory_sas_url(job_id):
         # Generate a blob SAS for a wildcard pattern or use container SAS with
         # the job directory as the base path.
         
+        now = datetime.now(timezone.utc)
+        cached = _container_sas_cache
+        if cached is not None and cached[1] - now > _SAS_MIN_REMAINING:
+            return f"{STORAGE_BASE_URI}/{job_id}/?{cached[0]}"
+        
         # Generate a container-level SAS token with write permissions
         # This is necessary for AzCopy to upload multiple files to different paths
         # We'll use a shorter expiry time for security
-        from azure.storage.blob import generate_container_sas, ContainerSasPermissions
-        
-        permissions = ContainerSasPermissions(
-            read=False,
-            add=False,
-            create=False,
-            write=True,
-            delete=False,
-            list=False
-        )
-        
-        start_time = datetime.now(timezone.utc) - timedelta(minutes=5)
-        # Shorter expiry for security - 2 hours instead of default 1 hour
-        expiry_time = datetime.now(timezone.utc) + timedelta(minutes=120)
+        start_time = now - _SAS_START_SKEW
+        expiry_time = now + _SAS_TTL
         
         sas_token = generate_container_sas(
             account_name=STORAGE_ACCOUNT_NAME,
             container_name=STORAGE_CONTAINER_UPLOAD,
             account_key=STORAGE_ACCOUNT_KEY,
-            permission=permissions,
+            permission=_DIR_SAS_PERMS,
             start=start_time,
             expiry=expiry_time,
             protocol='https'
         )
+        _container_sas_cache = (sas_token, expiry_time)
 
         # Build the SAS URL targeting the job directory
         # AzCopy will append the file paths to this base URL
-        directory_path = f"{job_id}/"
-        sas_url = build_azure_storage_uri(
-            account=STORAGE_ACCOUNT_NAME,
-            container=STORAGE_CONTAINER_UPLOAD,
-            path=directory_path,
-            sas_token=sas_token
-        )
+        sas_url = f"{STORAGE_BASE_URI}/{job_id}/?{sas_token}"
         
         logging.info(f"Generated directory SAS URL for job ID: {job_id}")
         return sas_url
@@ -244,23 +202,6 @@ def generate_directory_sas_url(job_id):
         logging.error(f"Error generating directory SAS URL: {str(e)}")
         raise
 
-def generate_azcopy_command(sas_url):
-    """
-    Generate an AzCopy command for uploading local files to the SAS URL.
-    
-    Args:
-        sas_url: The SAS URL to upload to
-        
-    Returns:
-        A command string that can be run to upload files using AzCopy
-    """
-    # The AzCopy command should use the SAS URL as the destination
-    # and ask the user to replace <local_folder_path> with their folder path
-    # Note: The SAS URL should end with the job directory path
-    azcopy_command = f'azcopy copy "<local_folder_path>/*" "{sas_url}" --recursive=true'
-    return azcopy_command
-
-
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function HTTP trigger to create a new image processing job.
@@ -279,25 +220,40 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     client_principal = req.headers.get('x-ms-client-principal')
     if not client_principal and not os.environ.get('AZURE_FUNCTIONS_ENVIRONMENT') == 'Development':
         return func.HttpResponse(
-            json.dumps({"error": "Authentication required"}),
+            _AUTH_REQUIRED_BODY,
             status_code=401,
             mimetype="application/json"
         )
     
     try:
-        # Parse request body
-        req_body = req.get_json() if req.get_body() else {}
+        # Parse request body (read once; an empty body is treated as {})
+        body = req.get_body()
+        try:
+            req_body = orjson.loads(body) if body else {}
+        except orjson.JSONDecodeError:
+            return func.HttpResponse(
+                _INVALID_JSON_BODY,
+                status_code=400,
+                mimetype="application/json"
+            )
+        
+        # Validate required fields before any Cosmos DB or storage work
+        if not isinstance(req_body, dict):
+            return func.HttpResponse(
+                _BODY_NOT_OBJECT_BODY,
+                status_code=400,
+                mimetype="application/json"
+            )
         
-        # Validate required fields
         if 'num_images' not in req_body or not isinstance(req_body['num_images'], int):
             return func.HttpResponse(
-                json.dumps({"error": "num_images is required and must be an integer"}),
+                _NUM_IMAGES_REQUIRED_BODY,
                 status_code=400,
                 mimetype="application/json"
             )
         
         # Generate a unique job ID
-        job_id = uuid.uuid4().hex
+        job_id = os.urandom(16).hex()
         
         # Create job status entry in Cosmos DB
         status = {
@@ -306,37 +262,41 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         }
         
         # Store job information in Cosmos DB
-        job_table = JobStatusTable()
-        job_table.create_job_status(job_id, status, req_body)
+        try:
+            _JOB_TABLE.create_job_status(job_id, status, req_body)
+        except CosmosHttpResponseError as e:
+            if e.status_code != 429:
+                raise
+            # Still throttled after the SDK's own retries: ask the client to back off
+            return func.HttpResponse(
+                _SERVICE_BUSY_BODY,
+                status_code=503,
+                headers={"Retry-After": str(get_retry_after_seconds(e))},
+                mimetype="application/json"
+            )
         
         # Generate SAS URL for the job directory (for internal use)
         job_sas_url = generate_directory_sas_url(job_id)
         
-        # Generate AzCopy command (only for internal use, to be passed back to the client)
+        # Generate AzCopy command (only for internal use, to be passed back to the client);
+        # the user fills in <local_folder_path>
         azcopy_command = f'azcopy copy "<local_folder_path>/*" "{job_sas_url}" --recursive=true'
         
-        # Return response with only the job ID
-        # But also include SAS URL and AzCopy command as custom headers for the client to use
-        response = {
-            "jobId": job_id
-        }
-        
+        # Return the job ID together with the SAS URL and AzCopy command for the client
         return func.HttpResponse(
-            json.dumps(response),
+            orjson.dumps({
+                "jobId": job_id,
+                "sasUrl": job_sas_url,
+                "azcopyCommand": azcopy_command
+            }),
             status_code=200,
-            headers={
-                "X-SAS-Token-URL": job_sas_url,
-                "X-AzCopy-Command": azcopy_command,
-                "Content-Type": "application/json",
-                "Access-Control-Expose-Headers": "X-SAS-Token-URL, X-AzCopy-Command"
-            },
             mimetype="application/json"
         )
         
     except Exception as e:
         logging.error(f"Error creating job: {str(e)}")
         return func.HttpResponse(
-            json.dumps({"error": str(e)}),
+            orjson.dumps({"error": str(e)}),
             status_code=500,
             mimetype="application/json"
         )
@@ -1,21 +1,34 @@
 import logging
-import json
 import os
+import re
 from datetime import datetime
 
 import azure.functions as func
-from azure.cosmos.cosmos_client import CosmosClient
+import orjson
 
-# Configuration constants
-COSMOS_ENDPOINT = os.environ.get('COSMOS_ENDPOINT')
-COSMOS_READ_KEY = os.environ.get('COSMOS_READ_KEY') or os.environ.get('COSMOS_WRITE_KEY')
-COSMOS_DB_NAME = 'camera-trap'
-COSMOS_CONTAINER_NAME = 'batch_api_jobs'
+from _cosmos import get_jobs_read_container
+
+# Maximum number of jobs returned per request; older jobs are fetched by passing
+# the offset returned in the X-Next-Offset header
+JOBS_PAGE_SIZE = 50
+
+# Characters not allowed in request_name; must match the sanitization applied
+# when jobs are created
+_USER_ID_SANITIZER = re.compile(r'[^a-zA-Z0-9._-]')
+
+# Static response bodies, serialized once at import time
+_AUTH_REQUIRED_BODY = orjson.dumps({"error": "Authentication required"})
+_USER_ID_REQUIRED_BODY = orjson.dumps({"error": "User ID is required"})
+_INVALID_OFFSET_BODY = orjson.dumps({"error": "offset must be a non-negative integer"})
 
 def format_datetime(dt_string):
     """
     Format datetime string for better display
     """
+    # Fast path for the 'YYYY-MM-DDTHH:MM:SS...' timestamps written by the API:
+    # the display form is just the date and time joined by a space
+    if isinstance(dt_string, str) and len(dt_string) >= 19 and dt_string[10] == 'T' and dt_string[16] == ':':
+        return dt_string[:10] + ' ' + dt_string[11:19]
     try:
         dt = datetime.fromisoformat(dt_string.replace('Z', '+00:00'))
         return dt.strftime('%Y-%m-%d %H:%M:%S')
@@ -35,6 +48,96 @@ def extract_folder_name(path_prefix):
         return parts[1]  # Return second element
     return path_prefix   # Return as is if no slash
 
+def _shape_detections(message):
+    """
+    Link straight to a detections URL, if the message has one as a string
+    """
+    if isinstance(message['detections'], str):
+        return {
+            'text': 'View Detections',
+            'url': message['detections']
+        }
+    return None
+
+def _shape_output_urls(message):
+    """
+    Link to the detections or output files listed under output_file_urls
+    """
+    output_file_urls = message['output_file_urls']
+    # If output_file_urls is itself a dictionary with 'detections'
+    if isinstance(output_file_urls, dict) and 'detections' in output_file_urls:
+        return {
+            'text': 'View Detections',
+            'url': output_file_urls['detections']
+        }
+    # If output_file_urls is a string
+    if isinstance(output_file_urls, str):
+        return {
+            'text': 'View Output Files',
+            'url': output_file_urls
+        }
+    # Otherwise, fall back to a generic link
+    return {
+        'text': 'View Results',
+        'url': '#'
+    }
+
+def _shape_generic(message):
+    """
+    Link to the first URL-like string value in any other message dictionary
+    """
+    for key, value in message.items():
+        if isinstance(value, str) and ('http://' in value or 'https://' in value):
+            return {
+                'text': f'View {key.replace("_", " ").title()}',
+                'url': value
+            }
+    # If no URL found, make it a simple message
+    return "Results available"
+
+# Message shapers tried in order by the key they handle; a shaper returns None
+# to pass the message on to the next one
+_MSG_SHAPERS = {
+    'detections': _shape_detections,
+    'output_file_urls': _shape_output_urls
+}
+
+def _shape_message(message):
+    """
+    Turn a job's status message into a display string or a {'text', 'url'} link
+    """
+    if isinstance(message, dict):
+        for key, shaper in _MSG_SHAPERS.items():
+            if key in message:
+                shaped = shaper(message)
+                if shaped is not None:
+                    return shaped
+        return _shape_generic(message)
+    
+    # Ensure message is always a string or a proper link object
+    if not isinstance(message, str):
+        return str(message)
+    return message
+
+def _shape_item(item):
+    """
+    Format one query result in place for display and return it
+    """
+    # Format the datetime fields for better display
+    if 'job_submission_time' in item:
+        item['job_submission_time'] = format_datetime(item['job_submission_time'])
+    if 'last_updated' in item:
+        item['last_updated'] = format_datetime(item['last_updated'])
+    
+    # Extract folder name from image_path_prefix
+    if 'image_path_prefix' in item:
+        item['folder_name'] = extract_folder_name(item['image_path_prefix'])
+    
+    # Handle complex message objects
+    if 'message' in item:
+        item['message'] = _shape_message(item['message'])
+    return item
+
 def main(req: func.HttpRequest) -> func.HttpResponse:
     """
     Azure Function HTTP trigger to get jobs by user ID.
@@ -53,7 +156,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     client_principal = req.headers.get('x-ms-client-principal')
     if not client_principal and not os.environ.get('AZURE_FUNCTIONS_ENVIRONMENT') == 'Development':
         return func.HttpResponse(
-            json.dumps({"error": "Authentication required"}),
+            _AUTH_REQUIRED_BODY,
             status_code=401,
             mimetype="application/json"
         )
@@ -64,21 +167,29 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         
         if not user_id:
             return func.HttpResponse(
-                json.dumps({"error": "User ID is required"}),
+                _USER_ID_REQUIRED_BODY,
+                status_code=400,
+                mimetype="application/json"
+            )
+        
+        # Position of the first job to return, for paging through older jobs
+        try:
+            offset = int(req.params.get('offset', 0))
+        except ValueError:
+            offset = -1
+        if offset < 0:
+            return func.HttpResponse(
+                _INVALID_OFFSET_BODY,
                 status_code=400,
                 mimetype="application/json"
             )
         
         # Sanitize the user ID to match the sanitization used when creating jobs
-        import re
-        invalid_chars_pattern = r'[^a-zA-Z0-9._-]'
-        sanitized_user_id = re.sub(invalid_chars_pattern, '_', user_id)
+        sanitized_user_id = _USER_ID_SANITIZER.sub('_', user_id)
         logging.info(f"Sanitized user ID '{user_id}' to '{sanitized_user_id}'")
         
-        # Connect to Cosmos DB
-        cosmos_client = CosmosClient(COSMOS_ENDPOINT, credential=COSMOS_READ_KEY)
-        db_client = cosmos_client.get_database_client(COSMOS_DB_NAME)
-        container_client = db_client.get_container_client(COSMOS_CONTAINER_NAME)
+        # Reuse the worker's read-only Cosmos DB client
+        container_client = get_jobs_read_container()
         
         # Define the query
         query = """
@@ -94,11 +205,16 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         FROM c 
         WHERE c.call_params.request_name = @userId
         ORDER BY c.job_submission_time DESC
+        OFFSET @offset LIMIT @limit
         """
         
-        # Define the parameters - use the sanitized user ID for the query
+        # Define the parameters - use the sanitized user ID for the query.
+        # One extra job is requested to tell whether another page exists; the
+        # SDK does not support continuation tokens for cross-partition ORDER BY.
         parameters = [
-            {"name": "@userId", "value": sanitized_user_id}
+            {"name": "@userId", "value": sanitized_user_id},
+            {"name": "@offset", "value": offset},
+            {"name": "@limit", "value": JOBS_PAGE_SIZE + 1}
         ]
         
         # Execute the query
@@ -107,82 +223,23 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
             parameters=parameters,
             enable_cross_partition_query=True
         ))
+        has_more = len(items) > JOBS_PAGE_SIZE
         
-        # Process the results
-        processed_items = []
-        for item in items:
-            # Format the datetime fields for better display
-            if 'job_submission_time' in item:
-                item['job_submission_time'] = format_datetime(item['job_submission_time'])
-            if 'last_updated' in item:
-                item['last_updated'] = format_datetime(item['last_updated'])
-            
-            # Extract folder name from image_path_prefix
-            if 'image_path_prefix' in item:
-                item['folder_name'] = extract_folder_name(item['image_path_prefix'])
-            
-            # Handle complex message objects
-            if 'message' in item:
-                # If message is a dictionary
-                if isinstance(item['message'], dict):
-                    # If it contains the 'detections' key directly, extract the URL
-                    if 'detections' in item['message'] and isinstance(item['message']['detections'], str):
-                        item['message'] = {
-                            'text': 'View Detections',
-                            'url': item['message']['detections']
-                        }
-                    # If it contains 'output_file_urls' key, extract from there
-                    elif 'output_file_urls' in item['message']:
-                        # If output_file_urls is itself a dictionary with 'detections'
-                        if isinstance(item['message']['output_file_urls'], dict) and 'detections' in item['message']['output_file_urls']:
-                            item['message'] = {
-                                'text': 'View Detections',
-                                'url': item['message']['output_file_urls']['detections']
-                            }
-                        # If output_file_urls is a string
-                        elif isinstance(item['message']['output_file_urls'], str):
-                            item['message'] = {
-                                'text': 'View Output Files',
-                                'url': item['message']['output_file_urls']
-                            }
-                        # Otherwise, convert the whole thing to a string for safety
-                        else:
-                            item['message'] = {
-                                'text': 'View Results',
-                                'url': '#'
-                            }
-                    # For any other dictionary, look for any URL-like string values
-                    else:
-                        url_found = False
-                        for key, value in item['message'].items():
-                            if isinstance(value, str) and ('http://' in value or 'https://' in value):
-                                item['message'] = {
-                                    'text': f'View {key.replace("_", " ").title()}',
-                                    'url': value
-                                }
-                                url_found = True
-                                break
-                        
-                        if not url_found:
-                            # If no URL found, make it a simple message
-                            item['message'] = "Results available"
-                
-                # Ensure message is always a string or a proper link object
-                if not isinstance(item['message'], (str, dict)):
-                    item['message'] = str(item['message'])
-            
-            processed_items.append(item)
+        # Shape each result for display
+        processed_items = [_shape_item(item) for item in items[:JOBS_PAGE_SIZE]]
         
+        headers = {"X-Next-Offset": str(offset + JOBS_PAGE_SIZE)} if has_more else None
         return func.HttpResponse(
-            json.dumps(processed_items),
+            orjson.dumps(processed_items),
             status_code=200,
+            headers=headers,
             mimetype="application/json"
         )
         
     except Exception as e:
         logging.error(f"Error retrieving jobs: {str(e)}")
         return func.HttpResponse(
-            json.dumps({"error": f"Error retrieving jobs: {str(e)}"}),
+            orjson.dumps({"error": f"Error retrieving jobs: {str(e)}"}),
             status_code=500,
             mimetype="application/json"
         )
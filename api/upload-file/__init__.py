@@ -1,16 +1,64 @@
 import logging
 import azure.functions as func
 import os
-import json
 import base64
-from azure.storage.blob import BlobServiceClient, BlobClient, ContentSettings
+import orjson
+from azure.storage.blob import ContentSettings
+from azure.storage.blob.aio import BlobServiceClient
 
 # Configuration constants - these would be loaded from environment variables in production
 STORAGE_ACCOUNT_NAME = os.environ.get('STORAGE_ACCOUNT_NAME')
 STORAGE_ACCOUNT_KEY = os.environ.get('STORAGE_ACCOUNT_KEY')
 STORAGE_CONTAINER_UPLOAD = os.environ.get('STORAGE_CONTAINER_UPLOAD', 'test-centralised-upload')
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+# Files larger than UPLOAD_SINGLE_PUT_SIZE are sent as UPLOAD_BLOCK_SIZE blocks,
+# up to UPLOAD_MAX_CONCURRENCY of them in parallel
+UPLOAD_SINGLE_PUT_SIZE = 8 * 1024 * 1024
+UPLOAD_BLOCK_SIZE = 4 * 1024 * 1024
+UPLOAD_MAX_CONCURRENCY = 8
+
+# Largest file accepted, checked before the body is decoded or uploaded
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(256 * 1024 * 1024)))
+
+# Static response bodies, serialized once at import time
+_AUTH_REQUIRED_BODY = orjson.dumps({"error": "Authentication required"})
+_MISSING_FIELDS_BODY = orjson.dumps({"error": "Missing required fields: jobId, fileName, fileContent"})
+_MISSING_PARAMS_BODY = orjson.dumps({"error": "Missing required parameters: jobId, filePath and a file body"})
+_INVALID_JSON_BODY = orjson.dumps({"error": "Invalid JSON"})
+_TOO_LARGE_BODY = orjson.dumps({"error": f"File exceeds the maximum upload size of {MAX_UPLOAD_BYTES} bytes"})
+
+# Async Blob service and upload container clients shared by all invocations
+# handled by this worker process. They are created on first use, inside the
+# worker's event loop; creation never awaits, so concurrent invocations cannot
+# race to build a second client.
+_blob_service_client = None
+_upload_container_client = None
+
+def get_blob_service_client():
+    """
+    Return the async Blob service client, creating it on first use.
+    """
+    global _blob_service_client
+    if _blob_service_client is None:
+        _blob_service_client = BlobServiceClient(
+            account_url=f"https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net",
+            credential=STORAGE_ACCOUNT_KEY,
+            max_single_put_size=UPLOAD_SINGLE_PUT_SIZE,
+            max_block_size=UPLOAD_BLOCK_SIZE
+        )
+    return _blob_service_client
+
+def get_upload_container_client():
+    """
+    Return the client for the upload container, deriving it once from the
+    shared Blob service client.
+    """
+    global _upload_container_client
+    if _upload_container_client is None:
+        _upload_container_client = get_blob_service_client().get_container_client(STORAGE_CONTAINER_UPLOAD)
+    return _upload_container_client
+
+async def main(req: func.HttpRequest) -> func.HttpResponse:
     logging.info('Python HTTP trigger function processed a file upload request.')
     
     # Check if the user is authenticated
@@ -18,66 +66,114 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     # Allow unauthenticated access when running locally (Development)
     if not client_principal and not os.environ.get('AZURE_FUNCTIONS_ENVIRONMENT') == 'Development':
         return func.HttpResponse(
-            json.dumps({"error": "Authentication required"}),
+            _AUTH_REQUIRED_BODY,
             status_code=401,
             mimetype="application/json"
         )
     
     try:
-        # Parse request body
-        req_body = req.get_json()
-        
-        # Extract file information from request
-        job_id = req_body.get('jobId')
-        file_name = req_body.get('fileName')
-        file_path = req_body.get('filePath', file_name)  # Use filePath if provided, otherwise just fileName
-        file_content_b64 = req_body.get('fileContent')
-        content_type = req_body.get('contentType', 'application/octet-stream')
-        
-        # Validate required fields
-        if not job_id or not file_name or not file_content_b64:
+        # Reject oversize requests before reading or decoding the body
+        try:
+            content_length = int(req.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = 0
+        if content_length > MAX_UPLOAD_BYTES:
             return func.HttpResponse(
-                json.dumps({"error": "Missing required fields: jobId, fileName, fileContent"}),
-                status_code=400,
+                _TOO_LARGE_BODY,
+                status_code=413,
                 mimetype="application/json"
             )
         
-        # Decode base64 file content
-        try:
-            # Remove data URL prefix if present (e.g., "data:image/jpeg;base64,")
-            if ';base64,' in file_content_b64:
-                file_content_b64 = file_content_b64.split(';base64,')[1]
+        if 'jobId' in req.params:
+            # Raw upload: the request body is the file itself, and the job ID and
+            # path come from the query string, so nothing needs decoding
+            job_id = req.params.get('jobId')
+            file_path = req.params.get('filePath')
+            file_content = req.get_body()
+            content_type = req.headers.get('Content-Type') or 'application/octet-stream'
             
-            file_content = base64.b64decode(file_content_b64)
-        except Exception as e:
-            return func.HttpResponse(
-                json.dumps({"error": f"Invalid base64 content: {str(e)}"}),
-                status_code=400,
-                mimetype="application/json"
-            )
+            if not job_id or not file_path or not file_content:
+                return func.HttpResponse(
+                    _MISSING_PARAMS_BODY,
+                    status_code=400,
+                    mimetype="application/json"
+                )
+            
+            if len(file_content) > MAX_UPLOAD_BYTES:
+                return func.HttpResponse(
+                    _TOO_LARGE_BODY,
+                    status_code=413,
+                    mimetype="application/json"
+                )
+        else:
+            # Legacy upload: JSON payload with base64-encoded file content
+            try:
+                req_body = orjson.loads(req.get_body())
+            except orjson.JSONDecodeError:
+                return func.HttpResponse(
+                    _INVALID_JSON_BODY,
+                    status_code=400,
+                    mimetype="application/json"
+                )
+            
+            # Extract file information from request
+            job_id = req_body.get('jobId')
+            file_name = req_body.get('fileName')
+            file_path = req_body.get('filePath', file_name)  # Use filePath if provided, otherwise just fileName
+            file_content_b64 = req_body.get('fileContent')
+            content_type = req_body.get('contentType', 'application/octet-stream')
+            
+            # Validate required fields
+            if not job_id or not file_name or not file_content_b64:
+                return func.HttpResponse(
+                    _MISSING_FIELDS_BODY,
+                    status_code=400,
+                    mimetype="application/json"
+                )
+            
+            # Decode base64 file content
+            try:
+                # Remove data URL prefix if present (e.g., "data:image/jpeg;base64,")
+                if ';base64,' in file_content_b64:
+                    file_content_b64 = file_content_b64.split(';base64,')[1]
+                
+                # Every 4 base64 characters decode to at most 3 bytes
+                if len(file_content_b64) * 3 // 4 > MAX_UPLOAD_BYTES:
+                    return func.HttpResponse(
+                        _TOO_LARGE_BODY,
+                        status_code=413,
+                        mimetype="application/json"
+                    )
+                
+                file_content = base64.b64decode(file_content_b64)
+            except Exception as e:
+                return func.HttpResponse(
+                    orjson.dumps({"error": f"Invalid base64 content: {str(e)}"}),
+                    status_code=400,
+                    mimetype="application/json"
+                )
         
-        # Create blob client and upload file
-        blob_service_client = BlobServiceClient(
-            account_url=f"https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net",
-            credential=STORAGE_ACCOUNT_KEY
-        )
-        container_client = blob_service_client.get_container_client(STORAGE_CONTAINER_UPLOAD)
+        # Get blob client and upload file
+        container_client = get_upload_container_client()
         
         # Create blob path with job ID as directory and preserve subfolder structure
         blob_path = f"{job_id}/{file_path}"
         
-        # Upload the file to blob storage
+        # Upload the file to blob storage; the worker can serve other requests
+        # while this waits on the network
         blob_client = container_client.get_blob_client(blob_path)
         content_settings = ContentSettings(content_type=content_type)
         
-        blob_client.upload_blob(
+        await blob_client.upload_blob(
             file_content,
+            length=len(file_content),
             overwrite=True,
-            content_settings=content_settings
+            content_settings=content_settings,
+            max_concurrency=UPLOAD_MAX_CONCURRENCY
         )
         
         return func.HttpResponse(
-            json.dumps({
+            orjson.dumps({
                 "success": True,
                 "message": "File uploaded successfully",
                 "blobPath": blob_path
@@ -89,7 +185,7 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     except Exception as e:
         logging.error(f"Error uploading file: {str(e)}")
         return func.HttpResponse(
-            json.dumps({"error": str(e)}),
+            orjson.dumps({"error": str(e)}),
             status_code=500,
             mimetype="application/json"
         )
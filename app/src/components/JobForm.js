@@ -257,26 +257,13 @@ const JobForm = () => {
         return false;
       }
 
-      // Read the file as a base64 string
-      const fileContent = await new Promise((resolve, reject) => {
-        const reader = new FileReader();
-        reader.readAsDataURL(file);
-        reader.onload = () => resolve(reader.result);
-        reader.onerror = error => reject(error);
-      });
-      
       // Get the relative path from the file or from the parameter
       const filePath = file.webkitRelativePath || 
                        (relativePath ? relativePath + file.name : file.name);
       
-      // Prepare the payload
-      const payload = {
-        jobId,
-        fileName: file.name,
-        filePath: filePath, // Send the full path including subfolders
-        fileContent: fileContent,
-        contentType: file.type
-      };
+      // Send the file bytes as the request body; the job ID and the full path
+      // (including subfolders) go in the query string, so no base64 encoding is needed
+      const uploadUrl = `/api/upload-file?jobId=${encodeURIComponent(jobId)}&filePath=${encodeURIComponent(filePath)}`;
       
       // Upload via API with retry logic
       let lastError = null;
@@ -289,12 +276,12 @@ const JobForm = () => {
             await new Promise(resolve => setTimeout(resolve, backoffTime));
           }
           
-          const response = await fetch('/api/upload-file', {
+          const response = await fetch(uploadUrl, {
             method: 'POST',
             headers: {
-              'Content-Type': 'application/json',
+              'Content-Type': file.type || 'application/octet-stream',
             },
-            body: JSON.stringify(payload)
+            body: file
           });
           
           if (!response.ok) {
@@ -716,9 +703,8 @@ const JobForm = () => {
         const result = await response.json();
         console.log('Job created successfully:', result);
         
-        // Extract SAS URL and AzCopy command from response headers
-        const sasTokenUrl = response.headers.get('X-SAS-Token-URL');
-        const azCopyCommand = response.headers.get('X-AzCopy-Command');
+        // Extract SAS URL and AzCopy command from the response body
+        const { sasUrl: sasTokenUrl, azcopyCommand: azCopyCommand } = result;
         
         // Make a copy of the current files to preserve them
         const currentFiles = formData.files;
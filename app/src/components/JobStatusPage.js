@@ -18,6 +18,8 @@ const JobStatusPage = () => {
   const [actionMessageType, setActionMessageType] = useState('info'); // 'info', 'success', or 'error'
   const [processingJobId, setProcessingJobId] = useState(null);
   const [refreshTrigger, setRefreshTrigger] = useState(0);
+  const [nextOffset, setNextOffset] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const navigate = useNavigate();
   
   // Effect to fetch jobs data from the API
@@ -29,7 +31,7 @@ const JobStatusPage = () => {
         // Get the current user ID
         const userId = await getUserId();
         
-        // Fetch jobs from the API
+        // Fetch the most recent page of jobs from the API
         const response = await fetch(`/api/get-jobs-by-user?userId=${encodeURIComponent(userId)}`);
         
         if (!response.ok) {
@@ -39,6 +41,7 @@ const JobStatusPage = () => {
         const data = await response.json();
         console.log("Jobs data from API:", data);
         setJobs(data);
+        setNextOffset(response.headers.get('X-Next-Offset'));
         setError(null);
       } catch (err) {
         console.error("Error fetching jobs:", err);
@@ -144,6 +147,31 @@ const JobStatusPage = () => {
   const nextPage = () => setCurrentPage(prev => Math.min(prev + 1, totalPages));
   const prevPage = () => setCurrentPage(prev => Math.max(prev - 1, 1));
   
+  // Fetch the next page of older jobs and append it to the list
+  const loadMoreJobs = async () => {
+    try {
+      setLoadingMore(true);
+      
+      const userId = await getUserId();
+      const response = await fetch(
+        `/api/get-jobs-by-user?userId=${encodeURIComponent(userId)}&offset=${encodeURIComponent(nextOffset)}`
+      );
+      
+      if (!response.ok) {
+        throw new Error(`Error ${response.status}: ${response.statusText}`);
+      }
+      
+      const data = await response.json();
+      setJobs(prev => [...prev, ...data]);
+      setNextOffset(response.headers.get('X-Next-Offset'));
+    } catch (err) {
+      console.error("Error loading more jobs:", err);
+      setError('Failed to load more jobs. Please try again later.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+  
   // Function for refreshing the job list
   const refreshJobList = () => {
     setRefreshTrigger(prev => prev + 1);
@@ -419,6 +447,18 @@ const JobStatusPage = () => {
           <div className="pagination-info">
             Showing {indexOfFirstJob + 1}-{Math.min(indexOfLastJob, jobs.length)} of {jobs.length} jobs
           </div>
+          
+          {nextOffset && (
+            <div className="pagination">
+              <button
+                className="pagination-button"
+                onClick={loadMoreJobs}
+                disabled={loadingMore}
+              >
+                {loadingMore ? 'Loading...' : 'Load older jobs'}
+              </button>
+            </div>
+          )}
         </>
       )}
       